@@ -4,8 +4,9 @@ setup(
     name="problem-processor",
     version="0.1",
     packages=find_packages(),
+    python_requires='>=3.10',
     install_requires=[
-        'openai',
+        'openai>=1.0',
         'pyyaml',
         'pytest',
         'pytest-asyncio',
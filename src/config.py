@@ -1,11 +1,43 @@
+import json
 from dataclasses import dataclass
+from operator import attrgetter
 from typing import Optional
 import yaml
 from pathlib import Path
 from datetime import datetime
 from .exceptions import ValidationError
 
-@dataclass
+try:
+    from yaml import CSafeDumper as _BaseDumper
+except ImportError:
+    from yaml import SafeDumper as _BaseDumper
+
+
+class LeaderboardDumper(_BaseDumper):
+    """libyaml-backed dumper that skips anchor/alias detection."""
+
+    def ignore_aliases(self, data):
+        return True
+
+def _yaml_scalar(value) -> str:
+    """
+    Format a score the way PyYAML's representer would.
+    
+    YAML 1.1 floats need a '.' and spell non-finite values .nan/.inf, so
+    json.dumps output like 5e-05 or NaN would load back as strings.
+    """
+    if not isinstance(value, float):
+        return json.dumps(value)
+    if value != value:
+        return ".nan"
+    if value in (float("inf"), float("-inf")):
+        return ".inf" if value > 0 else "-.inf"
+    text = repr(value).lower()
+    if '.' not in text and 'e' in text:
+        text = text.replace('e', '.0e', 1)
+    return text
+
+@dataclass(slots=True)
 class Config:
     seed: int
     agent: str
@@ -15,6 +47,8 @@ class Config:
     mutate_on_start: bool
     openai_api_key: str
     current_round: int = 0
+    max_concurrent_requests: int = 10
+    max_tokens: int = 1024
 
     @classmethod
     def from_args(cls, args) -> 'Config':
@@ -27,6 +61,10 @@ class Config:
             raise ValidationError("topk_problems must be positive")
         if args.topk_problems > args.num_problems:
             raise ValidationError("topk_problems cannot exceed num_problems")
+        if args.max_concurrent_requests < 1:
+            raise ValidationError("max_concurrent_requests must be positive")
+        if args.max_tokens < 1:
+            raise ValidationError("max_tokens must be positive")
         
         return cls(
             seed=args.seed,
@@ -35,21 +73,57 @@ class Config:
             num_problems=args.num_problems,
             topk_problems=args.topk_problems,
             mutate_on_start=args.mutate_on_start,
-            openai_api_key=args.openai_api_key
+            openai_api_key=args.openai_api_key,
+            max_concurrent_requests=args.max_concurrent_requests,
+            max_tokens=args.max_tokens
         )
 
-    def save_leaderboard(self, problems: list, path: str = "leaderboard.yaml"):
+    def save_leaderboard(self, problems: list, path: str = "leaderboard.yaml", fast: bool = True):
+        """
+        Write the ranked problems to a YAML leaderboard.
+        
+        Args:
+            problems: Problems to rank by score
+            path: Destination file
+            fast: Emit the fixed leaderboard schema directly instead of going
+                through PyYAML. Strings are JSON-encoded, which is valid YAML.
+        """
+        timestamp = datetime.now().isoformat()
+        sorted_problems = sorted(problems, key=attrgetter('score'), reverse=True)
+        
+        if fast:
+            with open(path, 'w') as f:
+                f.write(
+                    f"timestamp: {json.dumps(timestamp)}\n"
+                    f"round_number: {self.current_round}\n"
+                    f"problems:{'' if sorted_problems else ' []'}\n"
+                )
+                for p in sorted_problems:
+                    f.write(
+                        f"- id: {json.dumps(p.id)}\n"
+                        f"  score: {_yaml_scalar(p.score)}\n"
+                        f"  mutations: {json.dumps(p.mutations)}\n"
+                        f"  quality_metrics: {{}}\n"
+                    )
+            return
+        
         data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "round_number": self.current_round,
             "problems": [
                 {
-                    "id": str(p.id),
+                    "id": p.id,
                     "score": p.score,
                     "mutations": p.mutations,
                     "quality_metrics": {}
-                } for p in sorted(problems, key=lambda x: x.score, reverse=True)
+                } for p in sorted_problems
             ]
         }
         with open(path, 'w') as f:
-            yaml.dump(data, f) 
\ No newline at end of file
+            yaml.dump(
+                data,
+                f,
+                Dumper=LeaderboardDumper,
+                default_flow_style=False,
+                sort_keys=False
+            )
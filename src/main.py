@@ -21,9 +21,12 @@ def parse_args():
     parser.add_argument("--topk_problems", type=int, default=5)
     parser.add_argument("--mutate_on_start", action="store_true")
     parser.add_argument("--openai_api_key", type=str, required=True)
+    parser.add_argument("--max_concurrent_requests", type=int, default=10)
+    parser.add_argument("--max_tokens", type=int, default=1024)
     return parser.parse_args()
 
 async def main():
+    processor = None
     try:
         args = parse_args()
         config = Config.from_args(args)
@@ -55,6 +58,9 @@ async def main():
     except Exception as e:
         logging.error(f"Unexpected error: {e}")
         return 1
+    finally:
+        if processor is not None:
+            await processor.cleanup()
     
     return 0
 
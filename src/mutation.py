@@ -1,41 +1,175 @@
-import openai
-from typing import List
+import asyncio
+import functools
+from openai import AsyncOpenAI
+from typing import Callable, List, Optional, Union
 from pathlib import Path
 from .problem import Problem
 
+# Models served by the Completions endpoint, which accepts a list of prompts
+COMPLETION_MODEL_PREFIXES = ("text-", "davinci", "curie", "babbage", "ada", "gpt-3.5-turbo-instruct")
+
+# Maximum prompts sent in a single Completions request
+COMPLETION_BATCH_SIZE = 20
+
+@functools.lru_cache(maxsize=32)
+def _read_prompt(path_str: str) -> str:
+    prompt_path = Path(path_str)
+    if not prompt_path.exists():
+        raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
+    return prompt_path.read_text()
+
+@functools.lru_cache(maxsize=32)
+def _compile_prompt(path_str: str) -> Callable[[str], str]:
+    """
+    Turn a prompt template into a callable that fills in {problem}.
+    
+    Templates whose only replacement field is {problem} are split once and
+    rejoined around the content, avoiding str.format parsing per call.
+    Anything else keeps str.format semantics.
+    """
+    template = _read_prompt(path_str)
+    rest = template.replace('{problem}', '')
+    if '{' in rest or '}' in rest:
+        return lambda content: template.format(problem=content)
+    parts = template.split('{problem}')
+    return lambda content: content.join(parts)
+
+def clear_prompt_cache():
+    """Drop cached prompt templates so edited files are re-read."""
+    _compile_prompt.cache_clear()
+    _read_prompt.cache_clear()
+
 class MutationHandler:
     def __init__(self, config):
         self.config = config
         self.prompt_dir = Path("output/prompts/mutations")
-        openai.api_key = config.openai_api_key
+        self._sem = asyncio.Semaphore(config.max_concurrent_requests)
+        self._client = None
+    
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Shared API client, created on first use so its connection pool is reused."""
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=self.config.openai_api_key)
+        return self._client
+    
+    async def close(self):
+        """Close the API client and its pooled connections."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
         
     def load_prompt(self, mutation_type: str) -> str:
-        prompt_path = self.prompt_dir / f"{mutation_type}.txt"
-        if not prompt_path.exists():
-            raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
-        return prompt_path.read_text()
+        return _read_prompt(str(self.prompt_dir / f"{mutation_type}.txt"))
+    
+    def _compiled_prompt(self, mutation_type: str) -> Callable[[str], str]:
+        return _compile_prompt(str(self.prompt_dir / f"{mutation_type}.txt"))
     
     async def mutate(self, problem: Problem, mutation_type: str) -> Problem:
-        prompt_template = self.load_prompt(mutation_type)
-        prompt = prompt_template.format(problem=problem.content)
+        prompt = self._compiled_prompt(mutation_type)(problem.content)
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await self.client.chat.completions.create(
                 model=self.config.agent,
                 messages=[
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": problem.content}
                 ]
             )
-            new_content = response['choices'][0]['message']['content']
-            new_problem = Problem.create(
-                content=new_content,
-                parent_id=problem.id
-            )
-            new_problem.mutations = problem.mutations + [mutation_type]
-            return new_problem
+            new_content = response.choices[0].message.content
+            return self._derive(problem, new_content, mutation_type)
         except Exception as e:
             raise RuntimeError(f"Mutation failed: {str(e)}")
 
+    async def mutate_batch(
+        self,
+        problems: List[Problem],
+        mutation_types: List[str],
+        on_result: Optional[Callable[[], None]] = None
+    ) -> List[Union[Problem, Exception]]:
+        """
+        Mutate many problems at once, pairing each problem with its mutation type.
+        
+        Completions-style models receive up to COMPLETION_BATCH_SIZE prompts
+        per request; chat models do not accept batched prompts, so their
+        calls are dispatched one per problem. Either way, requests run
+        concurrently, bounded by max_concurrent_requests.
+        
+        Returns:
+            List with one entry per input problem: the mutated Problem,
+            or the Exception raised while mutating it.
+        """
+        if self._is_completion_model():
+            async def run_chunk(start: int) -> List[Union[Problem, Exception]]:
+                end = start + COMPLETION_BATCH_SIZE
+                chunk = problems[start:end]
+                try:
+                    async with self._sem:
+                        results = await self._complete_batch(chunk, mutation_types[start:end])
+                except Exception as e:
+                    results = [e] * len(chunk)
+                if on_result is not None:
+                    for _ in results:
+                        on_result()
+                return results
+            
+            chunks = await asyncio.gather(
+                *(run_chunk(start) for start in range(0, len(problems), COMPLETION_BATCH_SIZE))
+            )
+            return [result for chunk in chunks for result in chunk]
+        
+        async def run_one(problem: Problem, mutation_type: str) -> Problem:
+            async with self._sem:
+                try:
+                    return await self.mutate(problem, mutation_type)
+                finally:
+                    if on_result is not None:
+                        on_result()
+        
+        return await asyncio.gather(
+            *(run_one(p, t) for p, t in zip(problems, mutation_types)),
+            return_exceptions=True
+        )
+    
+    async def _complete_batch(
+        self,
+        problems: List[Problem],
+        mutation_types: List[str]
+    ) -> List[Union[Problem, Exception]]:
+        try:
+            prompts = [
+                self._compiled_prompt(mutation_type)(problem.content)
+                for problem, mutation_type in zip(problems, mutation_types)
+            ]
+            response = await self.client.completions.create(
+                model=self.config.agent,
+                prompt=prompts,
+                max_tokens=self.config.max_tokens
+            )
+        except Exception as e:
+            error = RuntimeError(f"Mutation failed: {str(e)}")
+            return [error] * len(problems)
+        
+        # Choices are not guaranteed to come back in prompt order
+        texts = {choice.index: choice.text for choice in response.choices}
+        results = []
+        for i, (problem, mutation_type) in enumerate(zip(problems, mutation_types)):
+            if i in texts:
+                results.append(self._derive(problem, texts[i], mutation_type))
+            else:
+                results.append(RuntimeError("Mutation failed: no completion returned"))
+        return results
+    
+    def _is_completion_model(self) -> bool:
+        return self.config.agent.startswith(COMPLETION_MODEL_PREFIXES)
+    
+    def _derive(self, problem: Problem, new_content: str, mutation_type: str) -> Problem:
+        new_problem = Problem.create(
+            content=new_content,
+            parent_id=problem.id
+        )
+        new_problem.mutations = problem.mutations + [mutation_type]
+        return new_problem
+
     # Add the 'add_constraints' strategy
     mutation_types = [
         "rephrase",
@@ -46,17 +180,16 @@ class MutationHandler:
 
     # Implement the add_constraints method
     async def add_constraints(self, problem: Problem) -> Problem:
-        prompt_template = self.load_prompt("add_constraints")
-        prompt = prompt_template.format(problem=problem.content)
+        prompt = self._compiled_prompt("add_constraints")(problem.content)
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await self.client.chat.completions.create(
                 model=self.config.agent,
                 messages=[
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": problem.content}
                 ]
             )
-            new_content = response['choices'][0]['message']['content']
+            new_content = response.choices[0].message.content
             new_problem = Problem.create(
                 content=new_content,
                 parent_id=problem.id
@@ -1,27 +1,34 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional, List
-from uuid import UUID, uuid4
+from uuid import uuid4
 from datetime import datetime
+import itertools
 
-@dataclass
+# Ids only need to be unique within a run's output, so a per-process
+# prefix plus a counter replaces a uuid4 (and its entropy read) per Problem
+_run_id = uuid4().hex[:8]
+_id_counter = itertools.count()
+
+@dataclass(slots=True)
 class Problem:
-    id: UUID
+    id: str
     content: str
     score: float = 0.0
-    parent_id: Optional[UUID] = None
-    mutations: List[str] = None
+    parent_id: Optional[str] = None
+    mutations: List[str] = field(default_factory=list)
     created_at: datetime = None
+    # (content, mutations) that the current score was computed from; a
+    # mismatch, including in-place edits to mutations, forces a rescore
+    _score_key: Optional[tuple] = field(default=None, repr=False, compare=False)
     
     def __post_init__(self):
-        if self.mutations is None:
-            self.mutations = []
         if self.created_at is None:
             self.created_at = datetime.now()
     
     @classmethod
-    def create(cls, content: str, parent_id: Optional[UUID] = None) -> 'Problem':
+    def create(cls, content: str, parent_id: Optional[str] = None) -> 'Problem':
         return cls(
-            id=uuid4(),
+            id=f"{_run_id}-{next(_id_counter):08x}",
             content=content,
             parent_id=parent_id,
             score=0.0
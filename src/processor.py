@@ -1,13 +1,62 @@
 import asyncio
-from typing import List
+import functools
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, NamedTuple, Tuple
 from pathlib import Path
 import random
 from .problem import Problem
 from .mutation import MutationHandler
+from .sampling import reservoir_sample
 import logging
+import numpy as np
 from tqdm import tqdm
 import textstat
 
+# Mutations applied at random during a round
+MUTATION_TYPES = ("rephrase", "expand", "simplify")
+
+# Line endings recognised by text-mode (universal newlines) reads
+_NEWLINE_RE = re.compile(r'\r\n|\r|\n')
+
+# Keywords counted towards a problem's technical complexity
+_TECH_TERMS = frozenset({'implement', 'design', 'optimize', 'algorithm', 'system'})
+
+class ContentStats(NamedTuple):
+    """Content statistics consumed by the complexity and clarity factors."""
+    word_count: int
+    tech_hits: int
+    nested_count: int
+    paragraph_count: int
+    flesch: float
+    is_stripped: bool
+
+@functools.cache
+def _warm_textstat():
+    """
+    Load textstat's syllable dictionary once on the calling thread.
+    
+    textstat pulls cmudict in lazily through nltk, whose corpus loader is
+    not thread-safe on first use, so this must run before scoring fans out.
+    """
+    textstat.flesch_reading_ease("Warm up the syllable dictionary.")
+
+def _score_content(text: str) -> ContentStats:
+    """Gather every content statistic the scoring factors need in one place."""
+    words = text.split()
+    tech_hits = sum(1 for word in map(str.lower, words) if word in _TECH_TERMS)
+    return ContentStats(
+        word_count=len(words),
+        tech_hits=tech_hits,
+        nested_count=text.count('\n- '),
+        paragraph_count=text.count('\n\n') + 1,
+        flesch=textstat.flesch_reading_ease(text),
+        is_stripped=text.strip() == text
+    )
+
 class ProblemProcessor:
     """
     Core processor for managing problem mutations and evolution.
@@ -29,6 +78,10 @@ class ProblemProcessor:
         """
         self.config = config
         self.mutation_handler = MutationHandler(config)
+        # Content-derived score factors, shared by problems with identical text
+        self._score_cache: OrderedDict[str, Tuple[float, float]] = OrderedDict()
+        self._score_cache_size = 10 * config.num_problems
+        self._score_cache_lock = threading.Lock()
         random.seed(config.seed)
         logging.basicConfig(
             filename='processing.log',
@@ -43,6 +96,21 @@ class ProblemProcessor:
         Returns:
             List[Problem]: List of initialized Problem objects
             
+        Raises:
+            FileNotFoundError: If problems.txt is not found
+        """
+        return list(self.iter_problems())
+    
+    def iter_problems(self) -> Iterator[Problem]:
+        """
+        Lazily yield problems from the problems.txt file.
+        
+        The file is memory-mapped and read line by line, so only the
+        problems consumed so far are held in memory.
+        
+        Yields:
+            Problem: One Problem per non-blank line
+            
         Raises:
             FileNotFoundError: If problems.txt is not found
         """
@@ -50,8 +118,17 @@ class ProblemProcessor:
         if not problems_path.exists():
             raise FileNotFoundError("problems.txt not found")
             
-        with open(problems_path) as f:
-            return [Problem.create(line.strip()) for line in f if line.strip()]
+        with open(problems_path, 'rb') as f:
+            # mmap cannot map an empty file
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for raw in iter(mm.readline, b''):
+                    # mmap only splits on \n; also honour bare \r endings
+                    for line in _NEWLINE_RE.split(raw.decode()):
+                        line = line.strip()
+                        if line:
+                            yield Problem.create(line)
     
     def save_problem(self, problem: Problem):
         """
@@ -70,6 +147,42 @@ class ProblemProcessor:
         with open(output_path, "w") as f:
             f.write(problem.content)
     
+    def save_problems(self, problems: List[Problem]):
+        """
+        Save a batch of problems to the output directory in one pass.
+        
+        The output directory is opened once and each file is created
+        relative to that descriptor, skipping per-file path resolution
+        where the platform supports it. A failed write is reported and
+        does not stop the remaining problems from being saved.
+        
+        Args:
+            problems: Problem objects to save, one file each
+            
+        Raises:
+            IOError: If the output directory cannot be created or opened
+        """
+        output_dir = Path("output")
+        output_dir.mkdir(exist_ok=True)
+        
+        dir_fd = None
+        opener = None
+        if os.open in os.supports_dir_fd:
+            dir_fd = os.open(output_dir, os.O_RDONLY)
+            opener = functools.partial(os.open, dir_fd=dir_fd)
+        
+        try:
+            for problem in problems:
+                name = f"{problem.id}.txt"
+                try:
+                    with open(name if opener else output_dir / name, "w", opener=opener) as f:
+                        f.write(problem.content)
+                except Exception as e:
+                    print(f"Error saving problem {problem.id}: {str(e)}")
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+    
     async def process_round(self, problems: List[Problem]) -> List[Problem]:
         """
         Process a single round of problem mutations.
@@ -86,38 +199,91 @@ class ProblemProcessor:
         """
         logging.info(f"Starting processing round with {len(problems)} problems")
         
-        with tqdm(total=len(problems), desc="Processing problems") as pbar:
-            selected_problems = random.sample(
-                problems, 
-                min(self.config.num_problems, len(problems))
-            )
+        selected_problems = reservoir_sample(problems, self.config.num_problems)
+        
+        # Throttle redraws; mutations now complete in bursts
+        with tqdm(
+            total=len(selected_problems),
+            desc="Processing problems",
+            mininterval=0.5,
+            smoothing=0
+        ) as pbar:
+            chosen_types = random.choices(MUTATION_TYPES, k=len(selected_problems))
             
-            mutation_types = ["rephrase", "expand", "simplify"]
-            new_problems = []
+            results = await self.mutation_handler.mutate_batch(
+                selected_problems,
+                chosen_types,
+                on_result=lambda: pbar.update(1)
+            )
             
-            for problem in selected_problems:
-                mutation_type = random.choice(mutation_types)
-                try:
-                    new_problem = await self.mutation_handler.mutate(problem, mutation_type)
-                    new_problem.score = self.evaluate_problem(new_problem)
-                    new_problems.append(new_problem)
-                    self.save_problem(new_problem)
-                except Exception as e:
-                    print(f"Error processing problem {problem.id}: {str(e)}")
-                
-                pbar.update(1)
+        mutated = []
+        for problem, result in zip(selected_problems, results):
+            if isinstance(result, Exception):
+                print(f"Error processing problem {problem.id}: {str(result)}")
+                continue
+            mutated.append((problem, result))
+        
+        # Scoring starts only after every mutation has returned, so it does not
+        # overlap with network I/O; worker threads just keep the event loop free
+        # while textstat runs. Warm textstat here first so the threads never race
+        # on its lazy dictionary load.
+        if mutated:
+            try:
+                _warm_textstat()
+            except Exception as e:
+                logging.warning(f"Could not preload textstat: {e}")
+        scores = await asyncio.gather(
+            *(asyncio.to_thread(self.evaluate_problem, result) for _, result in mutated),
+            return_exceptions=True
+        )
+        
+        new_problems = []
+        for (problem, result), score in zip(mutated, scores):
+            if isinstance(score, Exception):
+                print(f"Error processing problem {problem.id}: {str(score)}")
+                continue
+            result.score = score
+            new_problems.append(result)
+        
+        try:
+            self.save_problems(new_problems)
+        except Exception as e:
+            print(f"Error saving problems: {str(e)}")
                 
         logging.info(f"Round completed. Generated {len(new_problems)} new variants")
         
-        for problem in problems:
-            if problem.score == 0:
-                problem.score = self.evaluate_problem(problem)
+        candidates = new_problems + problems
+        scores = np.fromiter(
+            (p.score for p in candidates),
+            dtype=float,
+            count=len(candidates)
+        )
+        
+        # New variants are already scored; only carried-over problems can be unscored
+        offset = len(new_problems)
+        for i in np.flatnonzero(scores[offset:] == 0) + offset:
+            problem = candidates[i]
+            problem.score = self.evaluate_problem(problem)
+            scores[i] = problem.score
                 
-        return sorted(
-            new_problems + problems,
-            key=lambda x: x.score,
-            reverse=True
-        )[:self.config.topk_problems]
+        return self._select_topk(candidates, scores, self.config.topk_problems)
+    
+    @staticmethod
+    def _select_topk(problems: List[Problem], scores: np.ndarray, k: int) -> List[Problem]:
+        """
+        Return the k highest-scoring problems, best first.
+        
+        Uses an O(n) partition to find the k-th best score, then stably sorts
+        only the problems at or above it, so ties keep their original
+        relative order exactly as sorted() would.
+        """
+        if k < len(problems):
+            kth = np.partition(-scores, k - 1)[k - 1]
+            idx = np.flatnonzero(-scores <= kth)
+        else:
+            idx = np.arange(len(problems))
+        idx = idx[np.argsort(-scores[idx], kind='stable')][:k]
+        return [problems[i] for i in idx]
     
     def evaluate_problem(self, problem: Problem) -> float:
         """
@@ -132,39 +298,67 @@ class ProblemProcessor:
         Returns:
             float: Score between 0 and 1
         """
+        score_key = (problem.content, tuple(problem.mutations))
+        if problem._score_key == score_key:
+            return problem.score
+        
         # Implement actual scoring logic
+        complexity, clarity = self._content_factors(problem)
         factors = {
-            'complexity': self._calculate_complexity(problem),
-            'clarity': self._calculate_clarity(problem),
+            'complexity': complexity,
+            'clarity': clarity,
             'diversity': self._calculate_diversity(problem),
             'mutation_quality': len(problem.mutations) / 10
         }
         
-        return sum(factors.values()) / len(factors)
+        score = sum(factors.values()) / len(factors)
+        problem.score = score
+        problem._score_key = score_key
+        return score
     
-    def _calculate_complexity(self, problem: Problem) -> float:
+    def _content_factors(self, problem: Problem) -> Tuple[float, float]:
+        """
+        Return the (complexity, clarity) factors, which depend only on content.
+        
+        Results are kept in a bounded LRU cache keyed by content, so repeated
+        or retained problem texts are scored once. The lock guards the cache
+        because evaluate_problem runs on worker threads.
+        """
+        key = problem.content
+        with self._score_cache_lock:
+            cached = self._score_cache.get(key)
+            if cached is not None:
+                self._score_cache.move_to_end(key)
+                return cached
+        
+        stats = _score_content(problem.content)
+        factors = (self._calculate_complexity(stats), self._calculate_clarity(stats))
+        
+        with self._score_cache_lock:
+            self._score_cache[key] = factors
+            if len(self._score_cache) > self._score_cache_size:
+                self._score_cache.popitem(last=False)
+        return factors
+    
+    def _calculate_complexity(self, stats: ContentStats) -> float:
         """
         Calculate problem complexity based on:
         - Word count
         - Technical terms
         - Nested requirements
         """
-        words = problem.content.split()
-        word_count = len(words)
-        
         # Basic complexity based on length
-        length_score = min(word_count / 100, 1.0)
+        length_score = min(stats.word_count / 100, 1.0)
         
         # Technical complexity based on keywords
-        technical_terms = ['implement', 'design', 'optimize', 'algorithm', 'system']
-        tech_score = sum(1 for word in words if word.lower() in technical_terms) / len(technical_terms)
+        tech_score = stats.tech_hits / len(_TECH_TERMS)
         
         # Nested complexity based on bullet points or numbered lists
-        nested_score = problem.content.count('\n- ') / 10
+        nested_score = stats.nested_count / 10
         
         return (length_score + tech_score + nested_score) / 3
     
-    def _calculate_clarity(self, problem: Problem) -> float:
+    def _calculate_clarity(self, stats: ContentStats) -> float:
         """
         Calculate problem clarity based on:
         - Sentence structure
@@ -172,14 +366,13 @@ class ProblemProcessor:
         - Formatting
         """
         # Readability score
-        readability = textstat.flesch_reading_ease(problem.content) / 100
+        readability = stats.flesch / 100
         
         # Structure score based on paragraphs
-        paragraphs = problem.content.count('\n\n') + 1
-        structure_score = min(paragraphs / 5, 1.0)
+        structure_score = min(stats.paragraph_count / 5, 1.0)
         
         # Format score based on consistent formatting
-        format_score = 1.0 if problem.content.strip() == problem.content else 0.8
+        format_score = 1.0 if stats.is_stripped else 0.8
         
         return (readability + structure_score + format_score) / 3
     
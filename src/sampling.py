@@ -0,0 +1,48 @@
+import math
+import random
+from itertools import islice
+from typing import Iterable, List, TypeVar
+
+T = TypeVar('T')
+
+_MISSING = object()
+
+def _uniform() -> float:
+    """Draw from the open interval (0, 1) so logarithms stay finite."""
+    u = random.random()
+    while u == 0.0:
+        u = random.random()
+    return u
+
+def reservoir_sample(iterable: Iterable[T], k: int) -> List[T]:
+    """
+    Uniformly sample k items from an iterable of unknown length.
+    
+    Implements Algorithm L (Li, 1994): after filling the reservoir it
+    jumps ahead by geometrically distributed gaps, so only
+    O(k * (1 + log(n / k))) random numbers are drawn and at most k items
+    are held in memory at once.
+    
+    Args:
+        iterable: Items to sample from; consumed once
+        k: Number of items to sample
+        
+    Returns:
+        List[T]: Up to k sampled items (all items if fewer than k)
+    """
+    if k <= 0:
+        return []
+        
+    it = iter(iterable)
+    reservoir = list(islice(it, k))
+    if len(reservoir) < k:
+        return reservoir
+        
+    w = math.exp(math.log(_uniform()) / k)
+    while True:
+        skip = math.floor(math.log(_uniform()) / math.log(1 - w))
+        item = next(islice(it, skip, None), _MISSING)
+        if item is _MISSING:
+            return reservoir
+        reservoir[random.randrange(k)] = item
+        w *= math.exp(math.log(_uniform()) / k)
@@ -0,0 +1,58 @@
+import math
+import pytest
+import yaml
+from src.config import Config
+from src.problem import Problem
+
+@pytest.fixture
+def config():
+    return Config(
+        seed=42,
+        agent="gpt-4",
+        num_rounds=1,
+        num_problems=3,
+        topk_problems=2,
+        mutate_on_start=False,
+        openai_api_key="test-key",
+        current_round=3
+    )
+
+def test_fast_leaderboard_matches_yaml_dump(config, tmp_path):
+    problems = [
+        Problem.create("First"),
+        Problem.create("Second: \"quoted\""),
+        Problem.create("Third"),
+        Problem.create("Fourth"),
+        Problem.create("Fifth")
+    ]
+    problems[0].score = 0.25
+    problems[1].score = 0.75
+    problems[2].score = 5e-05
+    problems[3].score = -1e+20
+    problems[4].score = float("nan")
+    problems[1].mutations = ["rephrase", "add_constraints"]
+    
+    fast_path = tmp_path / "fast.yaml"
+    slow_path = tmp_path / "slow.yaml"
+    config.save_leaderboard(problems, str(fast_path))
+    config.save_leaderboard(problems, str(slow_path), fast=False)
+    
+    fast = yaml.safe_load(fast_path.read_text())
+    slow = yaml.safe_load(slow_path.read_text())
+    fast.pop("timestamp")
+    slow.pop("timestamp")
+    
+    fast_scores = [p.pop("score") for p in fast["problems"]]
+    slow_scores = [p.pop("score") for p in slow["problems"]]
+    assert fast == slow
+    assert all(isinstance(score, float) for score in fast_scores)
+    assert [repr(score) for score in fast_scores] == [repr(score) for score in slow_scores]
+    assert fast_scores[:4] == [0.75, 0.25, 5e-05, -1e+20]
+    assert math.isnan(fast_scores[4])
+    assert fast["round_number"] == 3
+
+def test_fast_leaderboard_empty(config, tmp_path):
+    path = tmp_path / "leaderboard.yaml"
+    config.save_leaderboard([], str(path))
+    
+    assert yaml.safe_load(path.read_text())["problems"] == []
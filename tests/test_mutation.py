@@ -1,6 +1,7 @@
+import asyncio
 import pytest
-from unittest.mock import Mock, patch
-from src.mutation import MutationHandler
+from unittest.mock import AsyncMock, Mock, patch
+from src.mutation import COMPLETION_BATCH_SIZE, MutationHandler, clear_prompt_cache
 from src.problem import Problem
 from pathlib import Path
 
@@ -9,12 +10,29 @@ def config():
     config = Mock()
     config.agent = "gpt-4"
     config.openai_api_key = "test-key"
+    config.max_concurrent_requests = 2
+    config.max_tokens = 256
     return config
 
 @pytest.fixture
 def handler(config):
     return MutationHandler(config)
 
+@pytest.fixture
+def prompt_dir(handler, tmp_path):
+    prompt_dir = tmp_path / "output/prompts/mutations"
+    prompt_dir.mkdir(parents=True)
+    templates = {
+        "rephrase": "Rephrase: {problem}",
+        "expand": "Expand: {problem}",
+        "plain": "Rewrite {problem}, then repeat: {problem}",
+        "braces": "Return {{\"problem\": ...}} for {problem}",
+    }
+    for name, template in templates.items():
+        prompt_dir.joinpath(f"{name}.txt").write_text(template)
+    handler.prompt_dir = prompt_dir
+    return prompt_dir
+
 def test_load_prompt(handler, tmp_path):
     # Create a temporary prompt file
     prompt_dir = tmp_path / "output/prompts/mutations"
@@ -28,26 +46,131 @@ def test_load_prompt(handler, tmp_path):
     content = handler.load_prompt("test")
     assert content == "Test prompt content"
 
+def test_load_prompt_is_cached(handler, prompt_dir):
+    prompt_file = prompt_dir.joinpath("test.txt")
+    prompt_file.write_text("Original prompt")
+    
+    assert handler.load_prompt("test") == "Original prompt"
+    
+    prompt_file.write_text("Edited prompt")
+    assert handler.load_prompt("test") == "Original prompt"
+    
+    clear_prompt_cache()
+    assert handler.load_prompt("test") == "Edited prompt"
+
+def test_compiled_prompt_matches_format(handler, prompt_dir):
+    for name in ("plain", "braces"):
+        template = handler.load_prompt(name)
+        content = "Sort {a list}"
+        assert handler._compiled_prompt(name)(content) == template.format(problem=content)
+
 def test_load_prompt_missing_file(handler):
     with pytest.raises(FileNotFoundError):
         handler.load_prompt("nonexistent")
 
 @pytest.mark.asyncio(scope="function")
-async def test_mutate(handler):
+async def test_mutate(handler, prompt_dir):
     problem = Problem.create("Test problem")
     
     # Mock OpenAI response
-    mock_response = {
-        'choices': [{
-            'message': {
-                'content': 'Mutated content'
-            }
-        }]
-    }
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=Mock(content='Mutated content'))]
     
-    with patch('openai.ChatCompletion.acreate', return_value=mock_response):
+    with patch.object(handler.client.chat.completions, 'create',
+                      new_callable=AsyncMock, return_value=mock_response):
         mutated = await handler.mutate(problem, "rephrase")
         
         assert mutated.content == "Mutated content"
         assert mutated.parent_id == problem.id
-        assert "rephrase" in mutated.mutations 
\ No newline at end of file
+        assert "rephrase" in mutated.mutations
+    
+    await handler.close()
+    assert handler._client is None
+
+@pytest.mark.asyncio(scope="function")
+async def test_mutate_batch_bounds_concurrency(handler):
+    problems = [Problem.create(f"Problem {i}") for i in range(6)]
+    in_flight = 0
+    peak = 0
+    
+    async def fake_mutate(problem, mutation_type):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if problem is problems[2]:
+            raise RuntimeError("Mutation failed: boom")
+        return Problem.create(f"Mutated {problem.content}", problem.id)
+    
+    progress = Mock()
+    with patch.object(handler, 'mutate', new=AsyncMock(side_effect=fake_mutate)):
+        results = await handler.mutate_batch(problems, ["rephrase"] * 6, on_result=progress)
+    
+    assert peak == handler.config.max_concurrent_requests
+    assert progress.call_count == len(problems)
+    assert isinstance(results[2], RuntimeError)
+    for i, result in enumerate(results):
+        if i != 2:
+            assert result.content == f"Mutated Problem {i}"
+
+@pytest.mark.asyncio(scope="function")
+async def test_mutate_batch_matches_choices_by_index(handler, prompt_dir):
+    handler.config.agent = "text-davinci-003"
+    
+    problems = [Problem.create("First"), Problem.create("Second")]
+    
+    # Completions may come back out of prompt order
+    mock_response = Mock()
+    mock_response.choices = [
+        Mock(index=1, text='Expanded second'),
+        Mock(index=0, text='Rephrased first')
+    ]
+    
+    with patch.object(handler.client.completions, 'create',
+                      new_callable=AsyncMock, return_value=mock_response) as mock_create:
+        results = await handler.mutate_batch(problems, ["rephrase", "expand"])
+        
+        mock_create.assert_called_once()
+        assert mock_create.call_args.kwargs['prompt'] == ["Rephrase: First", "Expand: Second"]
+        assert mock_create.call_args.kwargs['max_tokens'] == 256
+        assert results[0].content == "Rephrased first"
+        assert results[0].parent_id == problems[0].id
+        assert results[0].mutations == ["rephrase"]
+        assert results[1].content == "Expanded second"
+        assert results[1].mutations == ["expand"]
+
+@pytest.mark.asyncio(scope="function")
+async def test_mutate_batch_chunks_completion_requests(handler, prompt_dir):
+    handler.config.agent = "text-davinci-003"
+    
+    problems = [Problem.create(f"Problem {i}") for i in range(COMPLETION_BATCH_SIZE + 5)]
+    
+    async def fake_create(model, prompt, max_tokens):
+        response = Mock()
+        response.choices = [Mock(index=i, text=f"Done {p}") for i, p in enumerate(prompt)]
+        return response
+    
+    with patch.object(handler.client.completions, 'create',
+                      new_callable=AsyncMock, side_effect=fake_create) as mock_create:
+        results = await handler.mutate_batch(problems, ["rephrase"] * len(problems))
+        
+        assert [len(call.kwargs['prompt']) for call in mock_create.call_args_list] == [COMPLETION_BATCH_SIZE, 5]
+        assert [r.content for r in results] == [f"Done Rephrase: {p.content}" for p in problems]
+
+@pytest.mark.asyncio(scope="function")
+async def test_mutate_batch_missing_prompt_on_completion_path(handler, tmp_path):
+    handler.prompt_dir = tmp_path / "missing"
+    handler.config.agent = "gpt-3.5-turbo-instruct"
+    problems = [Problem.create("First"), Problem.create("Second")]
+    progress = Mock()
+    
+    with patch.object(handler.client.completions, 'create', new_callable=AsyncMock) as mock_create:
+        results = await handler.mutate_batch(problems, ["rephrase", "expand"], on_result=progress)
+        
+        mock_create.assert_not_called()
+    
+    assert len(results) == len(problems)
+    assert all(isinstance(result, Exception) for result in results)
+    assert "Prompt file not found" in str(results[0])
+    assert progress.call_count == len(problems)
@@ -1,5 +1,4 @@
 import pytest
-from uuid import UUID
 from datetime import datetime
 from src.problem import Problem
 
@@ -7,7 +6,7 @@ def test_problem_creation():
     content = "Test problem content"
     problem = Problem.create(content)
     
-    assert isinstance(problem.id, UUID)
+    assert isinstance(problem.id, str)
     assert problem.content == content
     assert problem.score == 0.0
     assert problem.parent_id is None
@@ -16,11 +15,16 @@ def test_problem_creation():
     assert isinstance(problem.created_at, datetime)
 
 def test_problem_with_parent():
-    parent_id = UUID('12345678-1234-5678-1234-567812345678')
+    parent_id = Problem.create("Parent content").id
     problem = Problem.create("Test content", parent_id)
     
     assert problem.parent_id == parent_id
 
+def test_problem_ids_are_unique():
+    ids = {Problem.create("Test content").id for _ in range(100)}
+    
+    assert len(ids) == 100
+
 def test_mutations_list():
     problem = Problem.create("Test content")
     problem.mutations.append("rephrase")
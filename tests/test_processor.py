@@ -1,14 +1,19 @@
 import pytest
+import numpy as np
+import threading
 from unittest.mock import Mock, patch
-from src.processor import ProblemProcessor
+from src.processor import ProblemProcessor, _warm_textstat
+from src.problem import Problem
 from pathlib import Path
 
 @pytest.fixture
 def config():
     config = Mock()
     config.seed = 42
+    config.agent = "gpt-4"
     config.num_problems = 2
     config.topk_problems = 1
+    config.max_concurrent_requests = 2
     return config
 
 @pytest.fixture
@@ -30,6 +35,24 @@ def test_load_problems(processor, tmp_path):
         assert problems[0].content == "Problem 1"
         assert problems[1].content == "Problem 2"
 
+def test_load_problems_empty_file(processor, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "problems").mkdir()
+    (tmp_path / "problems" / "problems.txt").write_bytes(b"")
+    
+    assert processor.load_problems() == []
+
+def test_load_problems_line_endings(processor, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "problems").mkdir()
+    (tmp_path / "problems" / "problems.txt").write_bytes(
+        "Problem 1\r\nProblem 2\rProblem 3\n\u00a0\r\n".encode()
+    )
+    
+    problems = processor.load_problems()
+    
+    assert [p.content for p in problems] == ["Problem 1", "Problem 2", "Problem 3"]
+
 def test_save_problem(processor, tmp_path):
     # Create output directory
     output_dir = tmp_path / "output"
@@ -54,14 +77,117 @@ def test_save_problem(processor, tmp_path):
         assert real_output_path.exists()
         assert real_output_path.read_text() == "Test content"
 
+def test_save_problems(processor, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    problems = [Problem.create("First"), Problem.create("Second")]
+    
+    processor.save_problems(problems)
+    
+    for problem in problems:
+        assert (tmp_path / "output" / f"{problem.id}.txt").read_text() == problem.content
+
+def test_save_problems_continues_after_failure(processor, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    broken = Problem.create("Broken")
+    broken.content = None
+    problems = [Problem.create("First"), broken, Problem.create("Third")]
+    
+    processor.save_problems(problems)
+    
+    assert (tmp_path / "output" / f"{problems[0].id}.txt").read_text() == "First"
+    assert (tmp_path / "output" / f"{problems[2].id}.txt").read_text() == "Third"
+
 @pytest.mark.asyncio(scope="function")
-async def test_process_round(processor):
-    problems = [Mock(score=i) for i in range(3)]
+async def test_process_round(processor, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    problems = [Problem.create(f"Problem {i}") for i in range(3)]
     
-    with patch.object(processor.mutation_handler, 'mutate') as mock_mutate:
-        mock_mutate.return_value = Mock(score=10)
-        
+    def fake_mutate(problem, mutation_type):
+        new_problem = Problem.create(
+            f"Design and implement an algorithm to optimize this system: {problem.content}",
+            problem.id
+        )
+        new_problem.mutations = problem.mutations + [mutation_type]
+        return new_problem
+    
+    with patch('textstat.flesch_reading_ease', return_value=60.0), \
+            patch.object(processor.mutation_handler, 'mutate', side_effect=fake_mutate) as mock_mutate:
         result = await processor.process_round(problems)
         
+        assert mock_mutate.call_count == processor.config.num_problems
         assert len(result) == processor.config.topk_problems
-        assert result[0].score == 10
\ No newline at end of file
+        assert result[0].parent_id in {p.id for p in problems}
+        assert result[0].score == processor.evaluate_problem(result[0]) > 0
+        assert all(p.score > 0 for p in problems)
+        assert (tmp_path / "output" / f"{result[0].id}.txt").read_text() == result[0].content
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_process_round_warms_textstat_before_threads(processor, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    problems = [Problem.create(f"Problem {i}") for i in range(3)]
+    main_thread = threading.get_ident()
+    first_call_threads = []
+    
+    def fake_flesch(text):
+        if not first_call_threads:
+            first_call_threads.append(threading.get_ident())
+        return 60.0
+    
+    _warm_textstat.cache_clear()
+    with patch('textstat.flesch_reading_ease', side_effect=fake_flesch), \
+            patch.object(processor.mutation_handler, 'mutate',
+                         side_effect=lambda p, t: Problem.create(f"Variant of {p.content}", p.id)):
+        await processor.process_round(problems)
+    
+    assert first_call_threads == [main_thread]
+
+
+def test_evaluate_problem_is_memoized(processor):
+    problem = Problem.create("Design a system to optimize caching.")
+    
+    with patch('textstat.flesch_reading_ease', return_value=60.0), \
+            patch.object(processor, '_calculate_complexity', wraps=processor._calculate_complexity) as spy:
+        score = processor.evaluate_problem(problem)
+        assert processor.evaluate_problem(problem) == score
+        assert spy.call_count == 1
+        
+        # Reassigning mutations invalidates the cached score, but the
+        # content-derived factors are reused from the content cache
+        problem.mutations = ["rephrase"]
+        assert processor.evaluate_problem(problem) != score
+        assert spy.call_count == 1
+        assert problem.score == processor.evaluate_problem(problem)
+        
+        # So do in-place edits to the mutation history
+        previous = problem.score
+        problem.mutations.append("expand")
+        assert processor.evaluate_problem(problem) != previous
+
+def test_content_cache_is_bounded(processor):
+    limit = processor._score_cache_size
+    
+    with patch('textstat.flesch_reading_ease', return_value=60.0):
+        for i in range(limit + 5):
+            processor.evaluate_problem(Problem.create(f"Problem number {i}"))
+    
+    assert len(processor._score_cache) == limit
+    assert "Problem number 0" not in processor._score_cache
+
+def test_select_topk_matches_sorted(processor):
+    problems = [Mock(score=s) for s in [0.2, 0.9, 0.5, 0.9, 0.1]]
+    scores = np.array([p.score for p in problems])
+    
+    expected = sorted(problems, key=lambda x: x.score, reverse=True)
+    
+    assert processor._select_topk(problems, scores, 3) == expected[:3]
+    assert processor._select_topk(problems, scores, 10) == expected
+
+def test_select_topk_keeps_earliest_ties_at_boundary(processor):
+    problems = [Mock(score=s) for s in [0.5, 0.9, 0.5, 0.5, 0.1, 0.5]]
+    scores = np.array([p.score for p in problems])
+    
+    expected = sorted(problems, key=lambda x: x.score, reverse=True)
+    
+    for k in range(1, len(problems) + 1):
+        assert processor._select_topk(problems, scores, k) == expected[:k]
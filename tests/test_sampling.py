@@ -0,0 +1,24 @@
+import random
+from collections import Counter
+from src.sampling import reservoir_sample
+
+def test_sample_size_and_membership():
+    population = list(range(1000))
+    sample = reservoir_sample(iter(population), 10)
+    
+    assert len(sample) == 10
+    assert len(set(sample)) == 10
+    assert set(sample) <= set(population)
+
+def test_short_input_returns_everything():
+    assert reservoir_sample(iter([1, 2, 3]), 5) == [1, 2, 3]
+    assert reservoir_sample([1, 2, 3], 0) == []
+
+def test_sample_is_roughly_uniform():
+    random.seed(0)
+    counts = Counter()
+    for _ in range(2000):
+        counts.update(reservoir_sample(range(20), 5))
+    
+    # Each item is expected 500 times
+    assert all(350 < counts[i] < 650 for i in range(20))